@@ -4,7 +4,6 @@ import json
 import sys
 import argparse
 from datetime import datetime
-from jinja2 import Environment
 from engine.core import GameEngine
 
 # Add these imports for graceful shutdown
@@ -168,14 +167,8 @@ def handle_action_link():
         if not all([action_string, target_passage]):
             return "Error: 'action' and 'target_passage' are required.", 400
         
-        # Get the current game context (state + helper functions)
-        context = game_engine.get_template_context()
-        
-        # Use Jinja to execute the action string
-        # The {% do %} extension is needed for statements that don't produce output
-        env = Environment(extensions=['jinja2.ext.do'])
-        template = env.from_string(action_string)
-        template.render(**context) # This calls helpers like set_variable that modify the game_state
+        # Runs the action's Jinja code, which calls helpers like set_variable that modify the game_state
+        game_engine.run_link_action(action_string)
 
         # Render the target passage and return the HTML
         html = game_engine.render_main_passage(target_passage)
@@ -16,13 +16,25 @@ def build_standalone_game(project_name: str, project_root_dir: str):
     else:
         bundle_base_dir = os.path.dirname(os.path.abspath(__file__))
 
-    # Define paths to include relative to the bundle_base_dir
-    engine_path = os.path.join(bundle_base_dir, 'engine')
-    templates_path = os.path.join(bundle_base_dir, 'templates')
-    static_path = os.path.join(bundle_base_dir, 'static')
-    config_path = os.path.join(bundle_base_dir, 'config.py')
-    app_path = os.path.join(bundle_base_dir, 'app.py')
-    webview_wrapper_path = os.path.join(bundle_base_dir, 'webview_wrapper.py')
+    # Data to bundle as (path relative to bundle_base_dir, destination in bundle)
+    bundled_data = [
+        ('engine', 'engine'),
+        ('templates', 'templates'),
+        ('static', 'static'),
+        ('config.py', '.'),
+        ('app.py', '.'),
+    ]
+    base_prefix = bundle_base_dir + os.sep
+
+    # The game project is added entry by entry so its .cache directory (parse, bytecode and
+    # system code caches built on this machine) stays out of the executable
+    project_data = [
+        (os.path.join(project_absolute_path, entry),
+         f'game_data/{project_name}/{entry}' if os.path.isdir(os.path.join(project_absolute_path, entry)) else f'game_data/{project_name}')
+        for entry in sorted(os.listdir(project_absolute_path))
+        if entry != '.cache'
+    ]
+    webview_wrapper_path = base_prefix + 'webview_wrapper.py'
 
     # PyInstaller options
     # --noconsole: Do not open a console window (for GUI apps)
@@ -39,16 +51,12 @@ def build_standalone_game(project_name: str, project_root_dir: str):
         '--noconsole',         # For GUI application
         '--onefile',           # Create a single executable file
         f'--name={project_name}_game', # Name of the executable
-        
+
         # Add data files/folders
-        f'--add-data={engine_path}{os.pathsep}engine',
-        f'--add-data={templates_path}{os.pathsep}templates',
-        f'--add-data={static_path}{os.pathsep}static',
-        f'--add-data={config_path}{os.pathsep}.',
-        f'--add-data={app_path}{os.pathsep}.',
-        
+        *[f'--add-data={base_prefix}{src}{os.pathsep}{dest}' for src, dest in bundled_data],
+
         # Add the specific game project being built
-        f'--add-data={project_absolute_path}{os.pathsep}game_data/{project_name}',
+        *[f'--add-data={src}{os.pathsep}{dest}' for src, dest in project_data],
         
         # Optional: Specify where to put the dist and build folders
         '--distpath=./dist',
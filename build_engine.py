@@ -21,16 +21,20 @@ def build_engine_executable():
     # Determine the base directory of the project
     script_dir = os.path.dirname(os.path.abspath(__file__))
 
-    # Define paths to include
-    main_engine_path = os.path.join(script_dir, 'main_engine.py')
-    app_path = os.path.join(script_dir, 'app.py')
-    engine_dir = os.path.join(script_dir, 'engine')
-    templates_dir = os.path.join(script_dir, 'templates')
-    static_dir = os.path.join(script_dir, 'static')
-    config_py_path = os.path.join(script_dir, 'config.py')
-    webview_wrapper_path = os.path.join(script_dir, 'webview_wrapper.py')
-    build_py_path = os.path.join(script_dir, 'build.py')
-    config_manager_path = os.path.join(script_dir, 'config_manager.py')
+    # Data to bundle as (path relative to script_dir, destination in bundle)
+    bundled_data = [
+        # Python source files that are imported dynamically or needed by other parts
+        ('app.py', '.'),
+        ('build.py', '.'),
+        ('webview_wrapper.py', '.'),
+        ('config_manager.py', '.'),
+        # Directories
+        ('engine', 'engine'),
+        ('templates', 'templates'),
+        ('static', 'static'),
+    ]
+    script_prefix = script_dir + os.sep
+    main_engine_path = script_prefix + 'main_engine.py'
 
     # Determine platform for naming
     if sys.platform.startswith('linux'):
@@ -58,19 +62,8 @@ def build_engine_executable():
         f'--name=scribe-engine-v{version}-{platform_suffix}',  # Name of the executable
         f'--icon={script_dir}/SE_icon.png',
         
-        # Add Python source files that are imported dynamically or needed by other parts
-        f'--add-data={app_path}{os.pathsep}.',
-        f'--add-data={build_py_path}{os.pathsep}.',
-        f'--add-data={webview_wrapper_path}{os.pathsep}.',
-        f'--add-data={config_manager_path}{os.pathsep}.',
-
-        # Add directories
-        f'--add-data={engine_dir}{os.pathsep}engine',
-        f'--add-data={templates_dir}{os.pathsep}templates',
-        f'--add-data={static_dir}{os.pathsep}static',
-        
-        # Add config.py (if it's a separate file and not just part of app.py)
-        
+        # Add data files/folders
+        *[f'--add-data={script_prefix}{src}{os.pathsep}{dest}' for src, dest in bundled_data],
 
         # Hidden imports for modules that PyInstaller might miss
         '--hidden-import=flask',
@@ -1,5 +1,5 @@
 import os
-import json
+from engine import jsonio
 
 def get_config_dir():
     """Returns the appropriate configuration directory based on the OS."""
@@ -14,19 +14,34 @@ def get_config_file_path():
     os.makedirs(config_dir, exist_ok=True)
     return os.path.join(config_dir, 'config.json')
 
+# Last parsed config as (st_mtime_ns, config), reused until the file changes on disk
+_CACHE = None
+
 def load_config():
     """Loads the configuration from the config file."""
+    global _CACHE
     config_file = get_config_file_path()
-    if os.path.exists(config_file):
-        with open(config_file, 'r') as f:
-            return json.load(f)
-    return {}
+    try:
+        mtime = os.stat(config_file).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    if _CACHE is not None and _CACHE[0] == mtime:
+        return _CACHE[1]
+    with open(config_file, 'rb') as f:
+        config = jsonio.loads(f.read())
+    _CACHE = (mtime, config)
+    return config
 
 def save_config(config):
     """Saves the configuration to the config file."""
+    global _CACHE
     config_file = get_config_file_path()
-    with open(config_file, 'w') as f:
-        json.dump(config, f, indent=4)
+    # Write to a temporary file and swap it in so a crash never leaves a truncated config
+    temp_file = config_file + '.tmp'
+    with open(temp_file, 'wb') as f:
+        f.write(jsonio.dumps(config, pretty=True))
+    os.replace(temp_file, config_file)
+    _CACHE = (os.stat(config_file).st_mtime_ns, config)
 
 def get_project_root():
     """Retrieves the stored project root from the configuration."""
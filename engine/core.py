@@ -1,14 +1,81 @@
+import marshal
 import os
-import json
 import re
+import sys
+from importlib.util import MAGIC_NUMBER
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict, deque
 from datetime import datetime
-from jinja2 import Template, Environment
+from types import SimpleNamespace
+from jinja2 import Template, Environment, FileSystemBytecodeCache, FunctionLoader, TemplateSyntaxError, meta, nodes
 from markupsafe import Markup
-from html import escape
-from .parser import GameParser
-from .executor import SafeExecutor
-from .state import StateManager
+from .parser import GameParser, LINK_PATTERN, PARSER_VERSION
+from .executor import SafeExecutor, player_fields
+from .state import StateManager, split_key
 from .storage import JSONStorage
+from . import jsonio
+
+# Project subdirectories that never contain passages or systems
+_SKIPPED_DIRS = {'saves', 'assets', '.cache', '.git', '__pycache__'}
+
+# HTML wrappers for rendered passages and their choices, filled with %-formatting
+_PASSAGE_TEMPLATE = '<div class="passage" data-passage="%s"><div class="content">%s</div>%s</div>'
+# Arguments: target, target, text
+_CHOICE_BUTTON_TEMPLATE = (
+    '<button hx-get="/passage/%s" hx-target="#game-content" class="choice-btn" '
+    'data-target="%s">%s</button>'
+)
+# Arguments: action, target, target, text
+_ACTION_LINK_TEMPLATE = (
+    '<form hx-post="/action_link" hx-target="#game-content" class="action-link-form">'
+    '<input type="hidden" name="action" value="%s">'
+    '<input type="hidden" name="target_passage" value="%s">'
+    '<button type="submit" class="choice-btn" data-target="%s">%s</button>'
+    '</form>'
+)
+
+# Same replacements as html.escape(quote=True), applied in a single pass
+_HTML_ESCAPE_TABLE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;'})
+
+def escape(value):
+    """Escape a value for use in HTML text or a quoted attribute."""
+    return str(value).translate(_HTML_ESCAPE_TABLE)
+
+# Distinguishes a missing key from a stored None
+_MISSING = object()
+
+# Template calls that only read game state; a passage calling anything else is never memoized
+_PURE_TEMPLATE_CALLS = {'get_flag', 'has_item', 'get_item_count', 'input_field', 'range', 'dict', 'namespace', 'cycler', 'joiner'}
+# The game_state key each pure helper reads on the template's behalf
+_HELPER_STATE_KEYS = {'get_flag': 'flags', 'has_item': 'player', 'get_item_count': 'player'}
+
+# NavMenu link targets that leave the game
+_EXTERNAL_URL = re.compile(r'https?://')
+_NAV_URL_LINK_TEMPLATE = '<a href="%s" class="nav-link">%s</a>'
+_NAV_PASSAGE_LINK_TEMPLATE = '<a hx-get="/passage/%s" hx-target="#game-content" class="nav-link">%s</a>'
+# Distinct rendered NavMenus kept before the cache is reset
+_NAV_CACHE_LIMIT = 64
+
+def _replace_nav_link(match):
+    """Turn a [[text->target]] link in NavMenu into an <a> tag."""
+    target = match.group(2).strip()
+    # Always use <a> tag for uniformity
+    if _EXTERNAL_URL.match(target):
+        return _NAV_URL_LINK_TEMPLATE % (target, match.group(1).strip())
+    return _NAV_PASSAGE_LINK_TEMPLATE % (target, match.group(1).strip())
+
+# Parsed passages per .tgame path, as ((st_mtime_ns, st_size), passages), shared across engine reloads
+_PARSE_CACHE = {}
+# On-disk copy of the parse cache under <project>/.cache; marshal data is only valid for one Python version
+_PARSE_CACHE_FILE = 'passages.marshal'
+_PARSE_CACHE_HEADER = MAGIC_NUMBER + PARSER_VERSION.to_bytes(2, 'little')
+
+# Below this many files to (re)parse, worker process startup costs more than it saves
+_PARALLEL_PARSE_MIN_FILES = 16
+# Rendered #pure passages kept, least recently used first out
+_PURE_CACHE_SIZE = 256
+# Projects with more passages than this compile their templates at load rather than on first visit
+_EAGER_COMPILE_MIN_PASSAGES = 20
 
 class GameEngine:
     def __init__(self, project_path, debug_mode=False):
@@ -19,7 +86,24 @@ class GameEngine:
         self.systems = {}
 
         self.parser = GameParser()
+        self.cache_dir = os.path.join(self.project_path, '.cache')
         self.storage = JSONStorage(save_dir=os.path.join(self.project_path, 'saves'))
+        # Passage templates load by name, with compiled bytecode kept on disk between runs
+        self.jinja_env = Environment(
+            loader=FunctionLoader(self._load_template_source),
+            bytecode_cache=self._create_bytecode_cache(),
+            auto_reload=False,
+            cache_size=-1,
+            extensions=['jinja2.ext.do'],
+        )
+        self._template_cache = {}
+        self._compiled_blocks = {}
+        self._passage_html_parts = {}
+        self._state_dependencies = {}
+        self._special_cache = {}
+        self._pure_cache = OrderedDict()
+        self._navmenu_cache = {}
+        self._action_templates = {}
         
         self.load_project()
 
@@ -28,123 +112,272 @@ class GameEngine:
         config_path = os.path.join(self.project_path, 'project.json')
         if not os.path.exists(config_path):
             raise FileNotFoundError(f"Project config not found: {config_path}")
-        with open(config_path, 'r') as f:
-            self.config = json.load(f)
+        with open(config_path, 'rb') as f:
+            self.config = jsonio.loads(f.read())
 
-        # Store theme config for later use
+        # Store theme config for later use; the generated CSS only changes when the project reloads
         self.theme_config = self.config.get('theme', {})
+        self._theme_css = self._compute_theme_css()
 
-        features = self.config.get('features', {})
+        features = self.features = self.config.get('features', {})
         self.state_manager = StateManager(features, starting_passage=self.config.get('starting_passage', 'start'))
         self.game_state = self.state_manager.get_initial_state()
+
+        # Template helpers don't change between renders; they read self.game_state when called
+        self._stable_context = {
+            'get_flag': self._ctx_get_flag,
+            'set_flag': self._ctx_set_flag,
+            'has_item': self._ctx_has_item,
+            'get_item_count': self._ctx_get_item_count,
+            'get_variable': self.get_variable, # Expose new get_variable
+            'set_variable': self.set_variable, # Expose new set_variable
+            'input_field': self.generate_input_html, # Expose input_field macro
+            'now': datetime.now, # Add datetime.now to context
+        }
         
         python_files = []
         passage_files = []
-        for root, _, files in os.walk(self.project_path):
-            for file in files:
-                if file.endswith('.py'):
-                    python_files.append(os.path.join(root, file))
-                elif file.endswith('.tgame'):
-                    passage_files.append(os.path.join(root, file))
-        
-        self.executor = SafeExecutor(self.game_state, features, self.debug_mode)
-        self.executor.load_systems(python_files)
+        for path, kind in self._iter_project_files():
+            if kind == 'py':
+                python_files.append(path)
+            else:
+                passage_files.append(path)
+        passage_files.sort()
 
-        for passage_file in sorted(passage_files):
-            passages_from_file = self.parser.parse_file(passage_file)
-            self.passages.update(passages_from_file)
+        self.executor = SafeExecutor(self.game_state, features, self.debug_mode)
+        self.executor.load_systems(python_files, cache_dir=os.path.join(self.cache_dir, 'systems'))
+        self.systems = self.executor.get_systems()
+
+        # Later files win on duplicate passage names, as files are merged in sorted order
+        parsed_files = self._parse_passage_files(passage_files)
+        # The parser interns names and tags, but results unpickled from worker processes lose that
+        self.passages = {sys.intern(name): passage for parsed in parsed_files for name, passage in parsed.items()}
+        # Tag membership tests use sets; passage['tags'] stays a list because it is copied into game_state
+        self._tag_sets = {name: frozenset(map(sys.intern, passage['tags'])) for name, passage in self.passages.items()}
+
+        # Silent passages redirect through their first link; compile templated targets up front
+        self._silent_targets = {}
+        for name, passage in self.passages.items():
+            if 'silent' in self._tag_sets[name] and passage['links']:
+                target = passage['links'][0][1]
+                if '{' in target:
+                    try:
+                        self._silent_targets[name] = self.jinja_env.from_string(target)
+                    except TemplateSyntaxError:
+                        # Left for the first visit to report, as it would be without precompiling
+                        pass
+
+        # Action link forms can post any string, so only actions written in the story get cached templates
+        self._link_actions = frozenset(link[2] for passage in self.passages.values() for link in passage['links'] if link[2])
+
+        if len(self.passages) > _EAGER_COMPILE_MIN_PASSAGES:
+            self._precompile_templates()
 
         # After loading systems, check for custom player class
-        systems = self.executor.get_systems()
-        if not features.get('use_default_player', True) and 'Player' in systems:
-            PlayerClass = systems['Player']
-            if isinstance(PlayerClass, type):
-                player_instance = PlayerClass()
-                # Convert instance to a dictionary, excluding methods
-                player_dict = {k: v for k, v in vars(player_instance).items() if not k.startswith('__') and not callable(v)}
-                if 'player' not in self.game_state:
-                    self.game_state['player'] = {}
-                self.game_state['player'].update(player_dict)
+        self._has_custom_player = (not features.get('use_default_player', True)
+                                   and isinstance(self.systems.get('Player'), type))
+        if self._has_custom_player:
+            player_instance = self.systems['Player']()
+            # Convert instance to a dictionary, excluding methods
+            player_dict = player_fields(player_instance)
+            if 'player' not in self.game_state:
+                self.game_state['player'] = {}
+            self.game_state['player'].update(player_dict)
 
         if self.debug_mode:
             print(f"Loaded project '{self.config.get('title', 'Untitled')}'")
             print(f"  - {len(self.passages)} passages from {len(passage_files)} file(s)")
             print(f"  - Systems from {len(python_files)} file(s)")
 
+    def _iter_project_files(self):
+        """Yield (path, kind) for every .py and .tgame file in the project, skipping _SKIPPED_DIRS."""
+        pending = deque([self.project_path])
+        while pending:
+            with os.scandir(pending.popleft()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in _SKIPPED_DIRS:
+                            pending.append(entry.path)
+                    elif entry.name.endswith('.py'):
+                        yield entry.path, 'py'
+                    elif entry.name.endswith('.tgame'):
+                        yield entry.path, 'tgame'
+
+    def _parse_passage_files(self, passage_files):
+        """Parse .tgame files in order, reusing cached results for files whose mtime and size are unchanged."""
+        stamps = {}
+        for passage_file in passage_files:
+            st = os.stat(passage_file)
+            stamps[passage_file] = (st.st_mtime_ns, st.st_size)
+        stale = [f for f in passage_files if _PARSE_CACHE.get(f, (None,))[0] != stamps[f]]
+        if not stale:
+            return [_PARSE_CACHE[passage_file][1] for passage_file in passage_files]
+
+        # A fresh process starts from the previous run's results
+        disk_cache = self._read_parse_cache()
+        for passage_file in stale:
+            cached = disk_cache.get(passage_file)
+            if cached is not None and cached[0] == stamps[passage_file]:
+                _PARSE_CACHE[passage_file] = cached
+        stale = [f for f in stale if _PARSE_CACHE.get(f, (None,))[0] != stamps[f]]
+
+        # Files parse independently; frozen builds skip worker processes, which would relaunch the app
+        if len(stale) >= _PARALLEL_PARSE_MIN_FILES and not getattr(sys, 'frozen', False):
+            with ProcessPoolExecutor() as pool:
+                results = list(pool.map(self.parser.parse_file, stale, chunksize=8))
+        else:
+            results = [self.parser.parse_file(passage_file) for passage_file in stale]
+
+        for passage_file, passages in zip(stale, results):
+            _PARSE_CACHE[passage_file] = (stamps[passage_file], passages)
+        if stale or len(disk_cache) != len(passage_files):
+            self._write_parse_cache({passage_file: _PARSE_CACHE[passage_file] for passage_file in passage_files})
+        return [_PARSE_CACHE[passage_file][1] for passage_file in passage_files]
+
+    def _read_parse_cache(self):
+        """Returns the parse cache saved by a previous run, or {} if it is missing, stale or unreadable."""
+        try:
+            with open(os.path.join(self.cache_dir, _PARSE_CACHE_FILE), 'rb') as f:
+                data = f.read()
+            if data[:len(_PARSE_CACHE_HEADER)] != _PARSE_CACHE_HEADER:
+                return {}
+            return marshal.loads(data[len(_PARSE_CACHE_HEADER):])
+        except (OSError, EOFError, ValueError, TypeError):
+            return {}
+
+    def _write_parse_cache(self, entries):
+        """Saves parsed passages for the next run; failures only cost a reparse later."""
+        cache_file = os.path.join(self.cache_dir, _PARSE_CACHE_FILE)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(cache_file + '.tmp', 'wb') as f:
+                f.write(_PARSE_CACHE_HEADER + marshal.dumps(entries))
+            os.replace(cache_file + '.tmp', cache_file)
+        except (OSError, ValueError):
+            pass
+
     def _process_passage_content(self, passage_name, executor, use_raw_content=False):
         """Helper to execute Python blocks and render Jinja for a passage."""
-        if passage_name not in self.passages:
+        passage = self.passages.get(passage_name)
+        if passage is None:
             return f"<div class='debug-error'>Passage '{passage_name}' not found.</div>" if self.debug_mode else ""
 
-        passage = self.passages[passage_name]
-
-        content_to_process = passage['raw_content'] if use_raw_content else passage['content']
-        processed_content = self.execute_python_blocks(passage, executor, content_to_process=content_to_process)
-        
-        env = Environment(extensions=['jinja2.ext.do'])
-        template = env.from_string(processed_content)
-        rendered_content = template.render(**self.get_template_context())
-        
-        return rendered_content
+        # Most passages are plain text, so don't touch the executor at all for them
+        block_outputs = self.execute_python_blocks(passage_name, executor) if passage['python_blocks'] else None
+
+        context = self.get_template_context()
+        if block_outputs:
+            # The parser left a {{ PYTHON_BLOCK_i }} expression where each block was
+            context.update(block_outputs)
+        return self._get_passage_template(passage_name, use_raw_content).render(context)
+
+    def _create_bytecode_cache(self):
+        """Returns a bytecode cache under the project's .cache directory, or None if it can't be created."""
+        cache_dir = os.path.join(self.cache_dir, 'jinja')
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+        except OSError:
+            return None
+        return FileSystemBytecodeCache(cache_dir)
+
+    def _load_template_source(self, template_name):
+        """Jinja loader for passages: 'Name' is the rendered content, 'Name#raw' keeps links in place."""
+        passage_name, _, variant = template_name.partition('#')
+        passage = self.passages.get(passage_name)
+        if passage is None:
+            return None
+        return passage['raw_content'] if variant == 'raw' else passage['content']
+
+    def _precompile_templates(self):
+        """Compile the template variant each passage renders with, so first visits don't pay for it."""
+        for name in self.passages:
+            # NavMenu and silent passages render their raw content, with links left in place
+            use_raw_content = name == 'NavMenu' or 'silent' in self._tag_sets[name]
+            try:
+                self._get_passage_template(name, use_raw_content)
+            except TemplateSyntaxError:
+                # Left for the first render to report, as it would be without precompiling
+                pass
+        for action in self._link_actions:
+            try:
+                self._action_templates[action] = self.jinja_env.from_string(action)
+            except TemplateSyntaxError:
+                pass
+
+    def run_link_action(self, action):
+        """Runs an action link's Jinja code (e.g. {% do set_flag('x') %}) against the current game state."""
+        template = self._action_templates.get(action)
+        if template is None:
+            template = self.jinja_env.from_string(action)
+            if action in self._link_actions:
+                self._action_templates[action] = template
+        template.render(self.get_template_context())
+
+    def _get_passage_template(self, passage_name, use_raw_content=False):
+        """Returns the compiled Jinja template for a passage, compiling it on first use."""
+        key = (passage_name, use_raw_content)
+        template = self._template_cache.get(key)
+        if template is None:
+            # '#' can't appear in a passage name, since the parser splits tags on it
+            template_name = passage_name + '#raw' if use_raw_content else passage_name
+            template = self._template_cache[key] = self.jinja_env.get_template(template_name)
+        return template
 
     def render_passage_content(self, passage_name, executor):
         """Renders a single passage, executing its Python and Jinja logic, and generating HTML with choices."""
         rendered_content = self._process_passage_content(passage_name, executor)
-        passage = self.passages[passage_name]
-        links = passage['links'] if passage_name not in ['PrePassage', 'PostPassage'] else []
-        return self.generate_passage_html(passage_name, rendered_content, links)
+        # A passage's links never change, so the escaped name and choice markup are built once
+        html_parts = self._passage_html_parts.get(passage_name)
+        if html_parts is None:
+            passage = self.passages[passage_name]
+            links = passage['links'] if passage_name not in ['PrePassage', 'PostPassage'] else []
+            html_parts = self._passage_html_parts[passage_name] = (escape(passage_name), self._build_choices_html(links))
+        return _PASSAGE_TEMPLATE % (html_parts[0], rendered_content, html_parts[1])
 
     def render_special_passage(self, passage_name, executor=None):
         """Renders a single special-purpose passage (e.g., NavMenu, PrePassage, PostPassage)."""
-        # If no executor is passed, create a temporary one.
-        # This maintains compatibility for calls outside the main render loop (e.g., NavMenu).
+        # Calls outside the main render loop (e.g., NavMenu) share the engine's executor.
         if executor is None:
-            executor = SafeExecutor(self.game_state, self.config.get('features', {}), self.debug_mode)
-            executor.load_systems_from_cache(self.executor.get_systems())
+            executor = self.executor
 
         if passage_name == 'NavMenu':
             rendered_content = self._process_passage_content(passage_name, executor, use_raw_content=True)
             
-            # Replace links in-place for NavMenu
-            def replace_link(match):
-                text = match.group(1).strip()
-                target = match.group(2).strip()
-                # Always use <a> tag for uniformity
-                if target.startswith('http://') or target.startswith('https://'):
-                    return f'<a href="{target}" class="nav-link">{text}</a>'
-                else:
-                    return f'<a hx-get="/passage/{target}" hx-target="#game-content" class="nav-link">{text}</a>'
-
-            final_content = self.parser.link_pattern.sub(replace_link, rendered_content)
-            return f'<div class="passage" data-passage="{passage_name}"><div class="content">{final_content}</div></div>'
+            # Replace links in-place for NavMenu; the rendered menu rarely changes between turns
+            final_content = self._navmenu_cache.get(rendered_content)
+            if final_content is None:
+                if len(self._navmenu_cache) >= _NAV_CACHE_LIMIT:
+                    self._navmenu_cache.clear()
+                final_content = LINK_PATTERN.sub(_replace_nav_link, rendered_content)
+                self._navmenu_cache[rendered_content] = final_content
+            return _PASSAGE_TEMPLATE % (passage_name, final_content, '')
         else:
             return self.render_passage_content(passage_name, executor)
 
-    def render_main_passage(self, passage_name, _recursion_depth=0):
+    def render_main_passage(self, passage_name):
         """Render a main passage, handling silent passages and including Pre/Post passages."""
 
         # --- Last Passage Tracking ---
         previous_passage_name = self.game_state.get('current_passage')
         if previous_passage_name:
-            previous_passage_tags = self.passages.get(previous_passage_name, {}).get('tags', [])
-            if 'menu' not in previous_passage_tags:
+            if 'menu' not in self._tag_sets.get(previous_passage_name, ()):
                 self.game_state['last_passage'] = previous_passage_name
 
-        if _recursion_depth > 10: # Max recursion depth for silent passages
-            raise RecursionError("Exceeded max silent passage recursion depth. Check for loops.")
+        # The engine's executor already holds the loaded systems and a reference to game_state
+        executor = self.executor
 
-        if passage_name not in self.passages:
-            raise ValueError(f"Passage '{passage_name}' not found")
+        # Handle silent passages, following each one's first link until a regular passage is reached
+        silent_depth = 0
+        while True:
+            if silent_depth > 10: # Max depth for chains of silent passages
+                raise RecursionError("Exceeded max silent passage recursion depth. Check for loops.")
 
-        passage = self.passages[passage_name]
-        tags = passage.get('tags', [])
+            if passage_name not in self.passages:
+                raise ValueError(f"Passage '{passage_name}' not found")
 
-        # Create a single executor for this entire rendering sequence
-        executor = SafeExecutor(self.game_state, self.config.get('features', {}), self.debug_mode)
-        executor.load_systems_from_cache(self.executor.get_systems())
+            if 'silent' not in self._tag_sets[passage_name]:
+                break
 
-        # Handle silent passages
-        if 'silent' in tags:
             self._process_passage_content(passage_name, executor, use_raw_content=True)
 
             # After executing, find the next passage to redirect to
@@ -153,14 +386,18 @@ class GameEngine:
                 raise ValueError(f"Silent passage '{passage_name}' has no links to redirect to.")
 
             # Render the target of the first link to handle dynamic targets like {{...}}
-            template_context = self.get_template_context()
-            env = Environment()
-            first_link_target = links[0][1] # Target is the second item in the tuple
-            target_template = env.from_string(first_link_target)
-            next_passage_name = target_template.render(**template_context)
+            target_template = self._silent_targets.get(passage_name)
+            if target_template is None and '{' in links[0][1]:
+                # Only targets that failed to compile at load get here; compiling again raises the error
+                target_template = self.jinja_env.from_string(links[0][1])
+            if target_template is not None:
+                passage_name = target_template.render(self.get_template_context())
+            else:
+                passage_name = links[0][1] # Target is the second item in the tuple
+            silent_depth += 1
 
-            # Recursively call render_main_passage for the next passage
-            return self.render_main_passage(next_passage_name, _recursion_depth + 1)
+        passage = self.passages[passage_name]
+        tags = passage.get('tags', [])
 
         # --- Regular Passage Rendering ---
         self.game_state['current_passage'] = passage_name
@@ -173,103 +410,166 @@ class GameEngine:
         html_parts.append(f'<div id="passage-tags-container" class="{tag_classes}" hx-swap-oob="outerHTML"></div>')
 
         if 'PrePassage' in self.passages:
-            html_parts.append(self.render_special_passage('PrePassage', executor))
+            html_parts.append(self._render_special_memoized('PrePassage', executor))
 
-        html_parts.append(self.render_passage_content(passage_name, executor))
+        if 'pure' in self._tag_sets[passage_name]:
+            html_parts.append(self._render_pure_memoized(passage_name, executor))
+        else:
+            html_parts.append(self.render_passage_content(passage_name, executor))
 
         if 'PostPassage' in self.passages:
-            html_parts.append(self.render_special_passage('PostPassage', executor))
+            html_parts.append(self._render_special_memoized('PostPassage', executor))
 
         return "".join(html_parts)
 
-    def execute_python_blocks(self, passage, executor, content_to_process=None):
-        content = content_to_process if content_to_process is not None else passage['content']
-        
-        def get_placeholder(i):
-            return f"__PYTHON_BLOCK_{i}__"
-
-        for i, python_code in enumerate(passage['python_blocks']):
-            content = content.replace(f"{{{{ PYTHON_BLOCK_{i} }}}}", get_placeholder(i), 1)
+    def _render_special_memoized(self, passage_name, executor):
+        """Render PrePassage/PostPassage, reusing the last HTML while the game state it reads is unchanged."""
+        state_keys = self._get_state_dependencies(passage_name)
+        if state_keys is None:
+            return self.render_special_passage(passage_name, executor)
+
+        fingerprint = repr([self.game_state.get(key, _MISSING) for key in state_keys])
+        cached = self._special_cache.get(passage_name)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+        html = self.render_special_passage(passage_name, executor)
+        self._special_cache[passage_name] = (fingerprint, html)
+        return html
+
+    def _render_pure_memoized(self, passage_name, executor):
+        """Render a #pure passage, serving it from an LRU cache while the game state it reads is unchanged."""
+        state_keys = self._get_state_dependencies(passage_name)
+        if state_keys is None:
+            return self.render_passage_content(passage_name, executor)
 
-        for i, python_code in enumerate(passage['python_blocks']):
-            placeholder = get_placeholder(i)
+        key = (passage_name, repr([self.game_state.get(state_key, _MISSING) for state_key in state_keys]))
+        html = self._pure_cache.get(key)
+        if html is not None:
+            self._pure_cache.move_to_end(key)
+            return html
+        html = self._pure_cache[key] = self.render_passage_content(passage_name, executor)
+        if len(self._pure_cache) > _PURE_CACHE_SIZE:
+            self._pure_cache.popitem(last=False)
+        return html
+
+    def _get_state_dependencies(self, passage_name):
+        """Cached _find_state_dependencies for a passage."""
+        if passage_name not in self._state_dependencies:
+            self._state_dependencies[passage_name] = self._find_state_dependencies(self.passages[passage_name])
+        return self._state_dependencies[passage_name]
+
+    def _find_state_dependencies(self, passage):
+        """
+        Returns the sorted game_state keys a passage's rendered output depends on, or None if
+        rendering may have side effects (python blocks, {% do %}, impure calls) or reads system objects.
+        """
+        if passage['python_blocks']:
+            return None
+        ast = self.jinja_env.parse(passage['content'])
+        if any(True for _ in ast.find_all(nodes.ExprStmt)):
+            return None
+        # Other passages pulled in through the loader read state this scan can't see
+        if any(True for _ in ast.find_all((nodes.Include, nodes.Import, nodes.FromImport, nodes.Extends))):
+            return None
+        for call in ast.find_all(nodes.Call):
+            if not isinstance(call.node, nodes.Name) or call.node.name not in _PURE_TEMPLATE_CALLS:
+                return None
+        if any(f.name == 'random' for f in ast.find_all(nodes.Filter)):
+            return None
+
+        state_keys = set()
+        for name in meta.find_undeclared_variables(ast):
+            if name in _HELPER_STATE_KEYS:
+                state_keys.add(_HELPER_STATE_KEYS[name])
+            elif name in self.systems:
+                # System classes and their attributes can change without touching game_state
+                return None
+            elif name not in self._stable_context:
+                state_keys.add(name)
+        return sorted(state_keys)
+
+    def _get_compiled_blocks(self, passage_name):
+        """Returns a passage's python blocks as code objects, compiling them on first use."""
+        compiled = self._compiled_blocks.get(passage_name)
+        if compiled is None:
+            compiled = []
+            for i, python_code in enumerate(self.passages[passage_name]['python_blocks']):
+                if python_code.isspace() or not python_code:
+                    # Nothing to run; execute_python_blocks just fills in the placeholder
+                    compiled.append(None)
+                    continue
+                try:
+                    compiled.append(compile(python_code, f'<passage:{passage_name}#{i}>', 'exec'))
+                except SyntaxError:
+                    # Keep the source so the executor reports the error each time the block runs
+                    compiled.append(python_code)
+            self._compiled_blocks[passage_name] = compiled
+        return compiled
+
+    def execute_python_blocks(self, passage_name, executor):
+        """Runs a passage's python blocks in order and returns each block's output keyed by its placeholder name."""
+        block_outputs = {}
+        sources = self.passages[passage_name]['python_blocks']
+        for i, code in enumerate(self._get_compiled_blocks(passage_name)):
+            if code is None:
+                block_outputs[f'PYTHON_BLOCK_{i}'] = ''
+                continue
             try:
-                error = executor.execute_code(python_code)
-                replacement = f'<div class="debug-error">{error}</div>' if error and self.debug_mode else ''
-                content = content.replace(placeholder, replacement, 1)
+                error = executor.execute_code(code, sources[i])
+                output = f'<div class="debug-error">{error}</div>' if error and self.debug_mode else ''
             except Exception as e:
-                replacement = f'<div class="debug-error">Python Error: {str(e)}</div>' if self.debug_mode else ''
-                content = content.replace(placeholder, replacement, 1)
-        
-        return content
-    
+                output = f'<div class="debug-error">Python Error: {str(e)}</div>' if self.debug_mode else ''
+            block_outputs[f'PYTHON_BLOCK_{i}'] = output
+        return block_outputs
+
+    # Flags are a plain dict, so the flag helpers read and write it directly
+    def _ctx_get_flag(self, name, default=False):
+        return self.game_state.get('flags', {}).get(name, default)
+
+    def _ctx_set_flag(self, name, value=True):
+        self.game_state.setdefault('flags', {})[name] = value
+
+    def _ctx_has_item(self, item):
+        return self.state_manager.has_item(self.game_state, item)
+
+    def _ctx_get_item_count(self, item):
+        return self.state_manager.get_item_count(self.game_state, item)
+
     def get_template_context(self):
-        context = self.game_state.copy()
-        context.update(self.executor.get_systems())
+        # One merge per render; helpers take precedence over state and systems of the same name
+        context = {**self.game_state, **self.systems, **self._stable_context}
 
         # Create a player object for the template context
         if 'player' in self.game_state:
-            player_data = self.game_state['player'].copy() # Create a copy to avoid modifying the original
-            features = self.config.get('features', {})
-            systems = self.executor.get_systems()
+            player_data = self.game_state['player']
 
-            if not features.get('use_default_player', True) and 'Player' in systems and isinstance(systems['Player'], type):
+            if self._has_custom_player:
                 # Remove any keys that are not valid arguments for the Player constructor
-                player_data.pop('class_name', None)
-                context['player'] = systems['Player'](**player_data)
+                player_data = {k: v for k, v in player_data.items() if k != 'class_name'}
+                context['player'] = self.systems['Player'](**player_data)
             else:
-                from types import SimpleNamespace
+                # SimpleNamespace copies the keyword arguments, leaving game_state untouched
                 context['player'] = SimpleNamespace(**player_data)
 
-        context.update({
-            'get_flag': lambda name, default=False: self.state_manager.get_flag(self.game_state, name, default),
-            'set_flag': lambda name, value=True: self.state_manager.set_flag(self.game_state, name, value),
-            'has_item': lambda item: self.state_manager.has_item(self.game_state, item),
-            'get_item_count': lambda item: self.state_manager.get_item_count(self.game_state, item),
-            'get_variable': self.get_variable, # Expose new get_variable
-            'set_variable': self.set_variable, # Expose new set_variable
-            'input_field': self.generate_input_html, # Expose input_field macro
-            'now': datetime.now, # Add datetime.now to context
-        })
         return context
     
-    def generate_passage_html(self, passage_name, content, links):
-        html_parts = []
-        
-        html_parts.append(f'<div class="passage" data-passage="{passage_name}">')
-        html_parts.append('<div class="content">')
-        html_parts.append(content)
-        html_parts.append('</div>')
-        
-        if links:
-            html_parts.append('<div class="choices">')
-            for text, target, action in links:
-                if action:
-                    escaped_action = escape(action)
-                    html_parts.append(f'''
-                        <form hx-post="/action_link" hx-target="#game-content" class="action-link-form">
-                            <input type="hidden" name="action" value="{escaped_action}">
-                            <input type="hidden" name="target_passage" value="{target}">
-                            <button type="submit" class="choice-btn" data-target="{target}">
-                                {text if text else "Continue"}
-                            </button>
-                        </form>
-                    ''')
-                else:
-                    display_text = text if text else "Continue"
-                    html_parts.append(f'''
-                        <button hx-get="/passage/{target}" 
-                                hx-target="#game-content" 
-                                class="choice-btn"
-                                data-target="{target}">
-                            {display_text}
-                        </button>
-                    ''')
-            html_parts.append('</div>')
-        
-        html_parts.append('</div>')
-        
-        return ''.join(html_parts)    
+    def _build_choices_html(self, links):
+        """Returns the choices block for a passage's links, or '' when it has none."""
+        # Pre/Post passages and dead ends have no choices to build
+        if not links:
+            return ''
+
+        choices = []
+        for text, target, action in links:
+            # Link text is authored markup and is inserted as-is; attribute values are escaped
+            display_text = text if text else "Continue"
+            target = escape(target)
+            if action:
+                choices.append(_ACTION_LINK_TEMPLATE % (escape(action), target, target, display_text))
+            else:
+                choices.append(_CHOICE_BUTTON_TEMPLATE % (target, target, display_text))
+        return '<div class="choices">' + ''.join(choices) + '</div>'
+
     def generate_input_html(self, variable_name: str, input_type: str = 'text', placeholder: str = '', button_text: str = 'Submit', next_passage: str = None, **kwargs) -> str:
         """
         Generates HTML for an input field and a submit button, using HTMX to update game state.
@@ -283,7 +583,7 @@ class GameEngine:
         Returns:
             HTML string for the input form.
         """
-        input_attrs = ' '.join([f'{k}="{v}"' for k, v in kwargs.items()])
+        input_attrs = ' '.join([f'{k}="{escape(v)}"' for k, v in kwargs.items()])
         
         hidden_inputs = f'<input type="hidden" name="variable_name" value="{variable_name}">'
         if next_passage:
@@ -305,6 +605,9 @@ class GameEngine:
         saved_state = self.storage.load_game(slot)
         if saved_state:
             self.game_state = saved_state['game_state']
+            # The shared executor must see the loaded state, not the one it replaced
+            self.executor.rebind(self.game_state)
+            self._special_cache.clear()
             return True
         return False
     
@@ -318,12 +621,14 @@ class GameEngine:
         """
         Retrieves a variable from game_state using dot notation (e.g., 'player.name').
         """
-        parts = key.split('.')
+        if '.' not in key:
+            return self.game_state.get(key, default)
         current = self.game_state
-        for part in parts:
-            if isinstance(current, dict) and part in current:
-                current = current[part]
-            else:
+        for part in split_key(key):
+            if type(current) is not dict:
+                return default
+            current = current.get(part, _MISSING)
+            if current is _MISSING:
                 return default
         return current
 
@@ -332,7 +637,10 @@ class GameEngine:
         Sets a variable in game_state using dot notation (e.g., 'player.name').
         Creates nested dictionaries if they don't exist.
         """
-        parts = key.split('.')
+        if '.' not in key:
+            self.game_state[key] = value
+            return
+        parts = split_key(key)
         current = self.game_state
         for i, part in enumerate(parts):
             if i == len(parts) - 1:
@@ -363,19 +671,17 @@ class GameEngine:
         
 
     def _generate_theme_css(self) -> str:
+        """Returns the theme CSS computed when the project was loaded."""
+        return self._theme_css
+
+    def _compute_theme_css(self) -> str:
         """Generates a CSS string with :root variables based on the project's theme config."""
         theme_config = self.config.get('theme', {})
         if not theme_config.get('enabled', False):
             return "" # Return empty string if theming is disabled
 
-        css_vars = []
-        colors = theme_config.get('colors', {})
-        for key, value in colors.items():
-            css_vars.append(f"  --{key}-color: {value};")
-
-        fonts = theme_config.get('fonts', {})
-        for key, value in fonts.items():
-            css_vars.append(f"  --font-family-{key}: {value};")
+        css_vars = [f"  --{key}-color: {value};" for key, value in theme_config.get('colors', {}).items()]
+        css_vars += [f"  --font-family-{key}: {value};" for key, value in theme_config.get('fonts', {}).items()]
 
         if not css_vars:
             return "" # No variables to generate
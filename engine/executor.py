@@ -1,8 +1,122 @@
+import functools
+import hashlib
+import marshal
+import os
 import sys
 import traceback
-import inspect
-from types import SimpleNamespace, FunctionType, ModuleType
-from typing import Dict, Any, Optional, List
+from collections import OrderedDict
+from importlib.util import MAGIC_NUMBER
+from types import CodeType, FunctionType
+from typing import Dict, Any, Optional, List, Tuple, Union
+from .state import find_inventory_item, split_key
+
+# Numba is optional; without it functions marked with jit simply run as plain Python
+try:
+    import numba
+    from numba.core.errors import NumbaError
+except ImportError:
+    numba = None
+
+# Distinguishes a missing key from a stored None
+_MISSING = object()
+
+# Most source strings compiled by execute_code before the least recently used is dropped
+_CODE_CACHE_SIZE = 256
+
+# Declared __slots__ fields per player class; those classes have no per-instance __dict__ to walk
+_SLOT_FIELDS: Dict[type, Tuple[str, ...]] = {}
+
+def player_fields(player_obj) -> Dict[str, Any]:
+    """Return the data attributes of a player object as a plain dict, skipping dunders and callables."""
+    cls = type(player_obj)
+    fields = _SLOT_FIELDS.get(cls)
+    if fields is None and not hasattr(player_obj, '__dict__'):
+        fields = []
+        for klass in cls.__mro__:
+            slots = klass.__dict__.get('__slots__', ())
+            fields.extend((slots,) if isinstance(slots, str) else slots)
+        fields = _SLOT_FIELDS[cls] = tuple(f for f in dict.fromkeys(fields) if not f.startswith('__'))
+    if fields is not None:
+        items = ((f, getattr(player_obj, f)) for f in fields if hasattr(player_obj, f))
+    else:
+        items = player_obj.__dict__.items()
+    return {k: v for k, v in items if not k.startswith('__') and not callable(v)}
+
+def jit(func):
+    """Mark a system function for compilation with Numba when load_systems finds Numba installed."""
+    func.__scribe_jit__ = True
+    return func
+
+def _with_python_fallback(name: str, compiled, func: FunctionType):
+    """Wrap a Numba dispatcher so calls switch to the plain Python func for good once Numba fails to compile it."""
+    impl = compiled
+
+    @functools.wraps(func)
+    def call(*args, **kwargs):
+        nonlocal impl
+        if impl is not func:
+            try:
+                return impl(*args, **kwargs)
+            except NumbaError as e:
+                # Numba compiles on the first call for each argument type, so typing errors only show up here
+                print(f"Could not JIT compile system function {name}, running it as plain Python: {e}")
+                impl = func
+        return func(*args, **kwargs)
+
+    return call
+
+class PlayerProxy:
+    """
+    Attribute access for the default player, reading through to its game_state dict.
+    Assignments and deletions are held until the block finishes without raising, then applied by commit().
+    """
+    __slots__ = ('_data', '_changes', '_transient')
+
+    def __init__(self, data: Dict[str, Any]):
+        object.__setattr__(self, '_data', data)
+        # Pending assignments; _MISSING marks a deleted attribute
+        object.__setattr__(self, '_changes', {})
+        # Callables and dunders can be set for the duration of a block but are never saved
+        object.__setattr__(self, '_transient', {})
+
+    def __getattr__(self, name):
+        if name in self._transient:
+            return self._transient[name]
+        value = self._changes.get(name, _MISSING)
+        if value is _MISSING and name not in self._changes:
+            value = self._data.get(name, _MISSING)
+        if value is _MISSING:
+            raise AttributeError(f"'player' has no attribute '{name}'")
+        return value
+
+    def __setattr__(self, name, value):
+        if name.startswith('__') or callable(value):
+            self._transient[name] = value
+            # Shadowing a saved attribute with a callable drops it from the save, as a namespace round-trip did
+            self._changes[name] = _MISSING
+        else:
+            self._transient.pop(name, None)
+            self._changes[name] = value
+
+    def __delattr__(self, name):
+        found = self._transient.pop(name, _MISSING) is not _MISSING
+        if not found:
+            # Raises AttributeError if the attribute doesn't exist
+            getattr(self, name)
+        self._changes[name] = _MISSING
+
+    def __repr__(self):
+        return f"PlayerProxy({self._data!r})"
+
+    def commit(self):
+        """Apply the block's assignments and deletions to the player's game_state dict."""
+        data = self._data
+        for name, value in self._changes.items():
+            if value is _MISSING:
+                data.pop(name, None)
+            else:
+                data[name] = value
+        self._changes.clear()
 
 class SafeExecutor:
     def __init__(self, game_state: Dict, features: Dict = None, debug_mode: bool = False):
@@ -11,53 +125,117 @@ class SafeExecutor:
         self.debug_mode = debug_mode
         self.allowed_imports = {'random', 'math', 'datetime'}
         self.systems = {}
+        self._safe_builtins = {
+            'len': len, 'str': str, 'int': int, 'float': float,
+            'bool': bool, 'list': list, 'dict': dict, 'range': range,
+            'min': min, 'max': max, 'sum': sum, 'abs': abs, 'round': round,
+            'print': self.debug_print, 'isinstance': isinstance,
+            'hasattr': hasattr, 'getattr': getattr, 'setattr': setattr,
+            '__import__': self._custom_import
+        }
+        # Globals that don't depend on game state, rebuilt only when systems change
+        self._base_globals = None
+        # Code objects for blocks passed in as source, keyed by that source
+        self._code_cache: Dict[str, CodeType] = OrderedDict()
 
-    def load_systems(self, python_files: List[str]):
-        """Load functions and classes from .py files into the executor."""
+    def load_systems(self, python_files: List[str], cache_dir: Optional[str] = None):
+        """Load functions and classes from .py files into the executor, reusing compiled code from cache_dir if given."""
         self.debug_print(f"Found {len(python_files)} Python files to load.")
-        temp_globals = {}
+        temp_globals = {'jit': jit}
         # First, execute all code in a shared temporary environment
         for py_file in python_files:
             self.debug_print(f"Loading system file: {py_file}")
-            with open(py_file, 'r', encoding='utf-8') as f:
-                try:
-                    exec(f.read(), temp_globals)
-                except Exception as e:
-                    print(f"Error loading system file {py_file}: {e}")
+            try:
+                with open(py_file, 'rb') as f:
+                    source = f.read()
+                exec(self._compile_system_file(py_file, source, cache_dir), temp_globals)
+            except Exception as e:
+                print(f"Error loading system file {py_file}: {e}")
+
+        if numba is not None:
+            self._jit_compile_marked(temp_globals, cache_dir)
 
         # Then, extract only the functions and classes
         for name, value in temp_globals.items():
+            if value is jit:
+                continue
             if isinstance(value, (FunctionType, type)) and not name.startswith('__'):
                 self.systems[name] = value
+        self._base_globals = None
+
+    def _jit_compile_marked(self, temp_globals: Dict[str, Any], cache_dir: Optional[str]):
+        """Replace jit-marked functions in temp_globals, so every caller gets the compiled version with its Python fallback."""
+        marked = {name: value for name, value in temp_globals.items()
+                  if isinstance(value, FunctionType) and getattr(value, '__scribe_jit__', False)}
+        if not marked:
+            return
+
+        if cache_dir is not None:
+            # Numba otherwise caches machine code in a __pycache__ beside each system file, inside the project
+            numba.config.CACHE_DIR = os.path.join(cache_dir, 'numba')
+
+        # Compiled functions get their own globals in which other marked functions are Numba dispatchers,
+        # since nopython code can call a dispatcher but not the Python wrapper other callers see
+        jit_globals = dict(temp_globals)
+        for name, func in marked.items():
+            jit_func = FunctionType(func.__code__, jit_globals, func.__name__, func.__defaults__, func.__closure__)
+            jit_func.__kwdefaults__ = func.__kwdefaults__
+            try:
+                jit_globals[name] = numba.njit(cache=cache_dir is not None)(jit_func)
+            except Exception as e:
+                print(f"Could not JIT compile system function {name}: {e}")
+                jit_globals[name] = func
+
+        for name, func in marked.items():
+            if jit_globals[name] is not func:
+                temp_globals[name] = _with_python_fallback(name, jit_globals[name], func)
+
+    def _compile_system_file(self, py_file: str, source: bytes, cache_dir: Optional[str]) -> CodeType:
+        """Compile a system file, using the code object cached for this exact source when there is one."""
+        if cache_dir is None:
+            # Compiling with the real filename lets tracebacks from system functions show their source
+            return compile(source.decode('utf-8'), py_file, 'exec')
+
+        # One entry per file: bytecode magic, then a digest of the source, then the marshalled code
+        cache_file = os.path.join(cache_dir, hashlib.blake2b(py_file.encode('utf-8'), digest_size=16).hexdigest() + '.marshal')
+        header = MAGIC_NUMBER + hashlib.blake2b(source, digest_size=16).digest()
+        try:
+            with open(cache_file, 'rb') as f:
+                data = f.read()
+            if data[:len(header)] == header:
+                return marshal.loads(data[len(header):])
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+
+        code = compile(source.decode('utf-8'), py_file, 'exec')
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_file + '.tmp', 'wb') as f:
+                f.write(header + marshal.dumps(code))
+            os.replace(cache_file + '.tmp', cache_file)
+        except OSError:
+            pass
+        return code
 
     def get_systems(self) -> Dict[str, Any]:
         return self.systems
 
-    def load_systems_from_cache(self, systems_cache: Dict[str, Any]):
-        """Load systems from a pre-existing cache."""
-        self.systems = systems_cache
-
-    def create_safe_globals(self) -> Dict[str, Any]:
-        """Create the sandboxed global environment for game code execution."""
-        def custom_import(name, globals=None, locals=None, fromlist=(), level=0):
-            if name in self.allowed_imports:
-                return __import__(name, globals, locals, fromlist, level)
-            raise ImportError(f"Module '{name}' is not allowed.")
+    def rebind(self, game_state: Dict, debug_mode: Optional[bool] = None):
+        """Point the executor at a different game state without reloading its systems."""
+        self.game_state = game_state
+        if debug_mode is not None:
+            self.debug_mode = debug_mode
 
-        safe_builtins = {
-            'len': len, 'str': str, 'int': int, 'float': float,
-            'bool': bool, 'list': list, 'dict': dict, 'range': range,
-            'min': min, 'max': max, 'sum': sum, 'abs': abs, 'round': round,
-            'print': self.debug_print, 'isinstance': isinstance,
-            'hasattr': hasattr, 'getattr': getattr, 'setattr': setattr,
-            '__import__': custom_import
-        }
+    def _custom_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        """__import__ replacement for the sandbox that only allows modules in allowed_imports."""
+        if name in self.allowed_imports:
+            return __import__(name, globals, locals, fromlist, level)
+        raise ImportError(f"Module '{name}' is not allowed.")
 
-        safe_globals = {
-            '__builtins__': safe_builtins,
-            'flags': self.game_state.get('flags', {}),
-            'variables': self.game_state.get('variables', {}),
-            'passage_tags': self.game_state.get('passage_tags', []), # Expose current passage tags
+    def _build_base_globals(self) -> Dict[str, Any]:
+        """Build the parts of the sandbox globals that stay the same between executions."""
+        base_globals = {
+            '__builtins__': self._safe_builtins,
             'set_flag': self.set_flag,
             'get_flag': self.get_flag,
             'set_variable': self.set_variable,
@@ -66,12 +244,34 @@ class SafeExecutor:
         }
 
         # Add systems
-        safe_globals.update(self.systems)
+        base_globals.update(self.systems)
+
+        # Conditionally add inventory helpers
+        if self.features.get('use_default_inventory', False):
+            base_globals.update({
+                'add_to_inventory': self.add_to_inventory,
+                'remove_from_inventory': self.remove_from_inventory,
+                'has_item': self.has_item,
+                'get_item_count': self.get_item_count,
+            })
+
+        return base_globals
+
+    def create_safe_globals(self) -> Dict[str, Any]:
+        """Create the sandboxed global environment for game code execution."""
+        if self._base_globals is None:
+            self._base_globals = self._build_base_globals()
+
+        # Copies keep names a block defines, or builtins it replaces, from leaking into the next block
+        safe_globals = self._base_globals.copy()
+        safe_globals['__builtins__'] = safe_globals['__builtins__'].copy()
+        safe_globals['flags'] = self.game_state.get('flags', {})
+        safe_globals['variables'] = self.game_state.get('variables', {})
+        safe_globals['passage_tags'] = self.game_state.get('passage_tags', []) # Expose current passage tags
 
         # Conditionally add player object
         if self.features.get('use_default_player', True):
-            player_dict = self.game_state.get('player', {})
-            safe_globals['player'] = SimpleNamespace(**player_dict)
+            safe_globals['player'] = PlayerProxy(self.game_state.setdefault('player', {}))
         else:
             # Use custom player class if provided
             if 'Player' in self.systems and isinstance(self.systems['Player'], type):
@@ -82,21 +282,30 @@ class SafeExecutor:
                 # Optionally, raise an error or default to a basic object
                 raise TypeError("Custom player class 'Player' not found in project Python files.")
 
-        # Conditionally add inventory helpers
-        if self.features.get('use_default_inventory', False):
-            safe_globals.update({
-                'add_to_inventory': self.add_to_inventory,
-                'remove_from_inventory': self.remove_from_inventory,
-                'has_item': self.has_item,
-                'get_item_count': self.get_item_count,
-            })
-
         return safe_globals
 
-    def execute_code(self, code: str) -> Optional[str]:
-        self.debug_print(f"execute_code received: {code}")
-        """Execute a block of code from a passage safely."""
+    def execute_code(self, code: Union[str, CodeType], source: Optional[str] = None) -> Optional[str]:
+        """
+        Execute a block of code from a passage safely, given as source or a compiled code object.
+        Callers passing a code object can pass its source too, for the debug log.
+        """
+        if isinstance(code, str) and (not code or code.isspace()):
+            return None
+        # Checked here so the message isn't formatted on every block when debugging is off
+        if self.debug_mode:
+            if source is None:
+                source = code.co_filename if isinstance(code, CodeType) else code
+            self.debug_print(f"execute_code received: {source}")
         try:
+            if not isinstance(code, CodeType):
+                source = code
+                code = self._code_cache.get(source)
+                if code is None:
+                    code = self._code_cache[source] = compile(source, '<passage>', 'exec')
+                    if len(self._code_cache) > _CODE_CACHE_SIZE:
+                        self._code_cache.popitem(last=False)
+                else:
+                    self._code_cache.move_to_end(source)
             safe_globals = self.create_safe_globals()
 
             exec(code, safe_globals)
@@ -113,9 +322,12 @@ class SafeExecutor:
         """Update the main game state from the sandbox environment after execution."""
         if 'player' in safe_globals:
             player_obj = safe_globals['player']
-            # Convert the player object (whether it's a SimpleNamespace or a custom class instance) to a dictionary
-            player_dict = {k: v for k, v in vars(player_obj).items() if not k.startswith('__') and not callable(v)}
-            self.game_state['player'] = player_dict
+            if type(player_obj) is PlayerProxy:
+                # Only reached once the block ran without raising, so its staged changes are kept
+                player_obj.commit()
+                return
+            # Convert the custom player class instance to a dictionary
+            self.game_state['player'] = player_fields(player_obj)
 
     def debug_print(self, *args):
         if self.debug_mode:
@@ -131,7 +343,7 @@ class SafeExecutor:
         return self.game_state.get('flags', {}).get(name, default)
 
     def set_variable(self, key: str, value: Any):
-        parts = key.split('.')
+        parts = split_key(key)
         current = self.game_state.setdefault('variables', {})
         for i, part in enumerate(parts):
             if i == len(parts) - 1:
@@ -142,7 +354,7 @@ class SafeExecutor:
                 current = current.setdefault(part, {})
 
     def get_variable(self, key: str, default: Any = None) -> Any:
-        parts = key.split('.')
+        parts = split_key(key)
         current = self.game_state.get('variables', {})
         for part in parts:
             if isinstance(current, dict) and part in current:
@@ -153,7 +365,7 @@ class SafeExecutor:
 
     def add_to_inventory(self, item: str, quantity: int = 1):
         inventory = self.game_state.get('player', {}).setdefault('inventory', [])
-        existing = next((i for i in inventory if i.get('name') == item), None)
+        existing = find_inventory_item(inventory, item)
         if existing:
             existing['quantity'] = existing.get('quantity', 1) + quantity
         else:
@@ -172,11 +384,8 @@ class SafeExecutor:
 
     def has_item(self, item: str) -> bool:
         inventory = self.game_state.get('player', {}).get('inventory', [])
-        return any(i.get('name') == item for i in inventory)
+        return find_inventory_item(inventory, item) is not None
 
     def get_item_count(self, item: str) -> int:
-        inventory = self.game_state.get('player', {}).get('inventory', [])
-        for inv_item in inventory:
-            if inv_item.get('name') == item:
-                return inv_item.get('quantity', 0)
-        return 0
+        existing = find_inventory_item(self.game_state.get('player', {}).get('inventory', []), item)
+        return existing.get('quantity', 0) if existing is not None else 0
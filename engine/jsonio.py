@@ -0,0 +1,22 @@
+import json
+
+# orjson is optional; it is much faster for project files and saves, but the stdlib works everywhere
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def loads(data):
+    """Parse JSON from str or bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj, pretty: bool = False) -> bytes:
+    """Serialize obj to UTF-8 encoded JSON, indented by two spaces when pretty is True."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, indent=2 if pretty else None, ensure_ascii=False).encode('utf-8')
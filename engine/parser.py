@@ -1,14 +1,21 @@
 import re
+import sys
 from typing import Dict, List, Tuple
 
+# Bump whenever parse results change for the same input, so on-disk parse caches are discarded
+PARSER_VERSION = 2
+
+# [[text->target]] or [[text->target||action]]; shared by the parser and the NavMenu renderer
+LINK_PATTERN = re.compile(r'\[\[(.*?)\s*->\s*(.*?)(?:\s*\|\|\s*(.*?))?\]\]', re.DOTALL)
+# {%- python %} ... {%- endpython %}
+PYTHON_BLOCK_PATTERN = re.compile(r'\{\%-?\s*python\s*\%\}(.*?)\{\%-?\s*endpython\s*\%\}', re.DOTALL)
+# Start of a ':: Name #tag' header line; the text between two of these is one passage
+PASSAGE_HEADER_PATTERN = re.compile(r'^::', re.MULTILINE)
+
 class GameParser:
     def __init__(self):
-        self.python_block_pattern = re.compile(
-            r'\{\%-?\s*python\s*\%\}(.*?)\{\%-?\s*endpython\s*\%\}',
-            re.DOTALL
-        )
-        # CORRECTED REGEX: Changed \\|\\| to \|\| to properly escape the pipes
-        self.link_pattern = re.compile(r'\[\[(.*?)\s*->\s*(.*?)(?:\s*\|\|\s*(.*?))?\]\]', re.DOTALL)
+        self.python_block_pattern = PYTHON_BLOCK_PATTERN
+        self.link_pattern = LINK_PATTERN
     
     def parse_file(self, filename: str) -> Dict:
         """Parse a .tgame file into passage data"""
@@ -18,18 +25,20 @@ class GameParser:
         return self.parse_content(content)
     
     def parse_content(self, content: str) -> Dict:
-        """Parse game content into passages using a more robust regex."""
+        """Parse game content into passages, splitting once on header lines."""
         passages = {}
-        # This regex finds a passage header and all its content until the next header or end of file
-        passage_pattern = re.compile(r'^::\s*(.+?)(?:\n|$)(.*?)(?=\n^::|\Z)', re.MULTILINE | re.DOTALL)
-        
-        for match in passage_pattern.finditer(content):
-            header = match.group(1).strip()
-            passage_content = match.group(2).strip()
+        # Anything before the first header isn't part of a passage
+        for chunk in PASSAGE_HEADER_PATTERN.split(content)[1:]:
+            header, _, passage_content = chunk.lstrip().partition('\n')
+            header = header.strip()
+            if not header:
+                continue
+            passage_content = passage_content.strip()
 
             parts = header.split('#')
-            passage_name = parts[0].strip()
-            tags = [t.strip() for t in parts[1:] if t.strip()]
+            # Names and tags are looked up and compared constantly at render time
+            passage_name = sys.intern(parts[0].strip())
+            tags = [sys.intern(t.strip()) for t in parts[1:] if t.strip()]
             
             passages[passage_name] = self.parse_passage(passage_content, tags)
             
@@ -50,18 +59,26 @@ class GameParser:
         # Replace Python blocks with placeholders
         processed_content = self.python_block_pattern.sub(extract_python, content)
         
-        # Extract links
-        raw_links = self.link_pattern.findall(processed_content)
-        # This print statement is useful for debugging, you can remove it if you wish
-        # print(f"DEBUG: Parsed links: {links}")
-        
-        # Remove links from the processed content to avoid displaying them raw
-        processed_content_no_links = self.link_pattern.sub('', processed_content).strip()
+        # Extract links and remove them from the content in one scan, so they aren't displayed raw
+        links = []
+        if '[[' not in processed_content:
+            # A substring check is much cheaper than running the regex over passages without links
+            processed_content_no_links = processed_content.strip()
+        else:
+            content_parts = []
+            last_end = 0
+            for match in self.link_pattern.finditer(processed_content):
+                text, target, action = match.groups()
+                links.append((text.strip(), target.strip(), (action or '').strip()))
+                content_parts.append(processed_content[last_end:match.start()])
+                last_end = match.end()
+            content_parts.append(processed_content[last_end:])
+            processed_content_no_links = ''.join(content_parts).strip()
 
         return {
             'content': processed_content_no_links,
             'raw_content': processed_content,
             'python_blocks': python_blocks,
-            'links': [(text.strip(), target.strip(), action.strip()) for text, target, action in raw_links],
+            'links': links,
             'tags': tags
         }
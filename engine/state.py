@@ -1,5 +1,18 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
+from functools import lru_cache
+
+@lru_cache(maxsize=1024)
+def split_key(key: str) -> Tuple[str, ...]:
+    """Split a dot-notation key (e.g. 'player.name') into its parts, memoized per key."""
+    return tuple(key.split('.'))
+
+def find_inventory_item(inventory: List[Dict[str, Any]], item: str) -> Optional[Dict[str, Any]]:
+    """Return the first inventory entry named item, or None."""
+    for entry in inventory:
+        if entry.get('name') == item:
+            return entry
+    return None
 
 class StateManager:
     def __init__(self, features: Dict = None, starting_passage: str = 'start'):
@@ -56,15 +69,12 @@ class StateManager:
     def has_item(self, state: Dict[str, Any], item: str) -> bool:
         """Check if player has item. Returns False if inventory system is disabled."""
         inventory = state.get('player', {}).get('inventory', [])
-        return any(i.get('name') == item for i in inventory)
+        return find_inventory_item(inventory, item) is not None
     
     def get_item_count(self, state: Dict[str, Any], item: str) -> int:
         """Get item count. Returns 0 if inventory system is disabled."""
-        inventory = state.get('player', {}).get('inventory', [])
-        for inv_item in inventory:
-            if inv_item.get('name') == item:
-                return inv_item.get('quantity', 0)
-        return 0
+        entry = find_inventory_item(state.get('player', {}).get('inventory', []), item)
+        return entry.get('quantity', 0) if entry is not None else 0
     
     def get_variable(self, state: Dict[str, Any], key: str, default: Any = None) -> Any:
         """Get variable value"""
@@ -1,6 +1,6 @@
 import os
-import json
 from datetime import datetime
+from . import jsonio
 
 class JSONStorage:
     def __init__(self, save_dir='saves'):
@@ -14,14 +14,14 @@ class JSONStorage:
             'timestamp': datetime.now().isoformat(),
             'version': '1.0'
         }
-        with open(filename, 'w') as f:
-            json.dump(save_data, f, indent=2)
+        with open(filename, 'wb') as f:
+            f.write(jsonio.dumps(save_data, pretty=True))
     
     def load_game(self, slot):
         filename = f"{self.save_dir}/slot_{slot}.json"
         if os.path.exists(filename):
-            with open(filename, 'r') as f:
-                return json.load(f)
+            with open(filename, 'rb') as f:
+                return jsonio.loads(f.read())
         return None
     
     def list_saves(self):
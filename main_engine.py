@@ -9,7 +9,6 @@ if sys.stderr is not None and sys.stderr.encoding != 'utf-8':
     
 import os
 import subprocess
-import json
 from datetime import datetime
 import argparse
 import threading
@@ -23,6 +22,7 @@ import app
 from app import reset_game_engine
 import build
 import webview_wrapper
+from engine import jsonio
 
 def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -38,8 +38,8 @@ def create_new_project(project_name: str, project_root_dir: str):
     print(f"Creating new project: {project_name} at {project_path}")
 
     os.makedirs(project_path)
-    os.makedirs(os.path.join(project_path, 'saves'))
-    os.makedirs(os.path.join(project_path, 'assets'))
+    os.mkdir(os.path.join(project_path, 'saves'))
+    os.mkdir(os.path.join(project_path, 'assets'))
 
     # Default project.json content
     default_project_json = {
@@ -93,19 +93,19 @@ You have taken your first step into a larger world.
 [[Go back->start]]
 """
 
-    # Write project.json
-    with open(os.path.join(project_path, 'project.json'), 'w') as f:
-        json.dump(default_project_json, f, indent=2)
-
-    # Write story.tgame
-    with open(os.path.join(project_path, 'story.tgame'), 'w') as f:
-        f.write(default_story_tgame)
-
-    # Optional: Create placeholder systems.py and custom.css
-    with open(os.path.join(project_path, 'systems.py'), 'w') as f:
-        f.write("# Your custom Python logic goes here.\n# You can create multiple .py files in your project to organize your code.\n")
-    with open(os.path.join(project_path, 'custom.css'), 'w') as f:
-        f.write("/* Your custom CSS goes here */\n")
+    # Skeleton files, encoded up front so each is written in one call
+    skeleton_files = [
+        ('project.json', jsonio.dumps(default_project_json, pretty=True)),
+        ('story.tgame', default_story_tgame.encode('utf-8')),
+        # Optional: placeholder systems.py and custom.css
+        ('systems.py', b"# Your custom Python logic goes here.\n# You can create multiple .py files in your project to organize your code.\n"),
+        ('custom.css', b"/* Your custom CSS goes here */\n"),
+    ]
+    for file_name, data in skeleton_files:
+        fd = os.open(os.path.join(project_path, file_name), os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o644)
+        # The buffered file object keeps writing until all of data is out, unlike a single os.write
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
 
     print(f"Project '{project_name}' created successfully.")
 
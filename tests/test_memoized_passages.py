@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from engine.core import GameEngine
+
+STORY = """
+:: start #pure
+Lamp: {% include 'lamp_status' %}
+
+:: lamp_status
+{{ 'on' if get_flag('lamp') else 'off' }}
+
+:: PrePassage
+Header {% include 'lamp_status' %}
+"""
+
+class IncludedPassageStateTest(unittest.TestCase):
+    def setUp(self):
+        self.project_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.project_dir, 'project.json'), 'w') as f:
+            json.dump({'title': 'Test', 'starting_passage': 'start'}, f)
+        with open(os.path.join(self.project_dir, 'story.tgame'), 'w') as f:
+            f.write(STORY)
+        self.engine = GameEngine(self.project_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.project_dir, ignore_errors=True)
+
+    def test_included_state_change_is_rendered(self):
+        html = self.engine.render_main_passage('start')
+        self.assertIn('Lamp: off', html)
+        self.assertIn('Header off', html)
+
+        self.engine.game_state['flags']['lamp'] = True
+        html = self.engine.render_main_passage('start')
+        self.assertIn('Lamp: on', html)
+        self.assertIn('Header on', html)
+
+SYSTEMS = """
+class World:
+    day = 0
+"""
+
+SYSTEM_STORY = """
+:: start
+{%- python %}
+World.day += 1
+{%- endpython %}
+Morning.
+
+:: almanac #pure
+Almanac {{ World.day }}
+
+:: PrePassage
+Day {{ World.day }}
+"""
+
+class SystemObjectStateTest(unittest.TestCase):
+    def setUp(self):
+        self.project_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.project_dir, 'project.json'), 'w') as f:
+            json.dump({'title': 'Test', 'starting_passage': 'start'}, f)
+        with open(os.path.join(self.project_dir, 'systems.py'), 'w') as f:
+            f.write(SYSTEMS)
+        with open(os.path.join(self.project_dir, 'story.tgame'), 'w') as f:
+            f.write(SYSTEM_STORY)
+        self.engine = GameEngine(self.project_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.project_dir, ignore_errors=True)
+
+    def test_pre_passage_shows_changed_system_attribute(self):
+        # PrePassage renders before the start passage's block runs
+        for day in range(3):
+            self.assertIn(f'Day {day}', self.engine.render_main_passage('start'))
+
+    def test_pure_passage_shows_changed_system_attribute(self):
+        self.assertIn('Almanac 0', self.engine.render_main_passage('almanac'))
+        self.engine.render_main_passage('start')
+        self.assertIn('Almanac 1', self.engine.render_main_passage('almanac'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+
+from engine.executor import SafeExecutor
+
+class PlayerProxyTest(unittest.TestCase):
+    def setUp(self):
+        self.game_state = {'flags': {}, 'variables': {}, 'player': {'name': 'Ada', 'health': 10}}
+        self.executor = SafeExecutor(self.game_state, {'use_default_player': True, 'use_default_inventory': True})
+
+    def test_assignments_are_saved(self):
+        error = self.executor.execute_code("player.health -= 3\nplayer.level = 2\ndel player.name")
+        self.assertIsNone(error)
+        self.assertEqual(self.game_state['player'], {'health': 7, 'level': 2})
+
+    def test_failed_block_discards_assignments(self):
+        error = self.executor.execute_code("player.health = 0\ndel player.name\n1 / 0")
+        self.assertEqual(error, 'ZeroDivisionError: division by zero')
+        self.assertEqual(self.game_state['player'], {'name': 'Ada', 'health': 10})
+
+    def test_block_reads_its_own_writes(self):
+        error = self.executor.execute_code(
+            "player.health = 1\n"
+            "assert player.health == 1\n"
+            "del player.name\n"
+            "assert not hasattr(player, 'name')\n"
+            "player.heal = len\n"
+            "assert player.heal is len\n"
+        )
+        self.assertIsNone(error)
+        self.assertEqual(self.game_state['player'], {'health': 1})
+
+    def test_missing_attribute_raises(self):
+        self.assertEqual(self.executor.execute_code("player.mana"), "AttributeError: 'player' has no attribute 'mana'")
+        self.assertEqual(self.executor.execute_code("del player.mana"), "AttributeError: 'player' has no attribute 'mana'")
+
+if __name__ == '__main__':
+    unittest.main()